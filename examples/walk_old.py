@@ -1,5 +1,8 @@
-from math import sin, cos
+# Earlier sine-wave gait, kept for reference. It imports servo_bus from the
+# repository root, so run it from there with: python -m examples.walk_old
+from math import sin, cos, pi
 from pylx16a.lx16a import LX16A, ServoTimeoutError
+from servo_bus import group_packet, reduce_latency
 import time
 
 # Constants
@@ -11,10 +14,28 @@ AMPLITUDE = 60
 OFFSET = 60
 FREQUENCY = 0.1
 
+# Per-servo gait coefficients: (index into servos, waveform, phase shift)
+GAIT = [
+    (0, sin, 0.0), (1, cos, 0.0),    # Front left leg (servos 1 and 2)
+    (6, sin, 4.71), (7, cos, 4.71),  # Back right leg (servos 7 and 8) - phase shifted
+    (2, sin, 1.57), (3, cos, 1.57),  # Front right leg (servos 3 and 4) - alternating gait
+    (4, sin, 3.14), (5, cos, 3.14),  # Back left leg (servos 5 and 6) - another phase shift
+]
+
+# The gait repeats every 2*pi / FREQUENCY ticks, so one period is computed up front
+GAIT_TICKS = round(2 * pi / FREQUENCY)
+
+
+def gait_table():
+    """Angles of every servo in GAIT for each tick of one gait period."""
+    return [[wave(tick * 2 * pi / GAIT_TICKS + phase) * AMPLITUDE + OFFSET for _, wave, phase in GAIT]
+            for tick in range(GAIT_TICKS)]
+
 
 def boot_sequence():
     """Initialize servos and set angle limits."""
     LX16A.initialize(SERIAL_PORT, 0.1)
+    reduce_latency()
     servos = []
     try:
         for servo_id in SERVO_IDS:
@@ -67,29 +88,20 @@ def main():
     servos = boot_sequence()
     homing_sequence(servos)
     
-    t = 0  # Time variable for smooth movement
+    # Each tick's group move is converted to servo units and framed once here,
+    # leaving only the serial write inside the loop
+    gait_servos = [servos[index] for index, _, _ in GAIT]
+    packets = [group_packet(zip(gait_servos, angles)) for angles in gait_table()]
+    tick = 0  # Position within the gait period
 
     print("Starting main walking loop...")
     while True:
-        # Front left leg (servos 1 and 2)
-        servos[0].move(sin(t) * AMPLITUDE + OFFSET)
-        servos[1].move(cos(t) * AMPLITUDE + OFFSET)
-
-        # Back right leg (servos 7 and 8) - phase shifted
-        servos[6].move(sin(t + 4.71) * AMPLITUDE + OFFSET)
-        servos[7].move(cos(t + 4.71) * AMPLITUDE + OFFSET)
-
-        # Front right leg (servos 3 and 4) - phase shifted for alternating gait
-        servos[2].move(sin(t + 1.57) * AMPLITUDE + OFFSET)
-        servos[3].move(cos(t + 1.57) * AMPLITUDE + OFFSET)
-
-        # Back left leg (servos 5 and 6) - another phase shift
-        servos[4].move(sin(t + 3.14) * AMPLITUDE + OFFSET)
-        servos[5].move(cos(t + 3.14) * AMPLITUDE + OFFSET)
+        # Send this tick's prebuilt packet in one write
+        LX16A._controller.write(packets[tick])
 
-        # Increment time for smooth movement
+        # Advance to the next tick for smooth movement
         time.sleep(0.05)
-        t += FREQUENCY
+        tick = (tick + 1) % GAIT_TICKS
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,88 @@
+from pylx16a.lx16a import *
+from servo_bus import move_group
+from datetime import datetime
+import serial.serialutil
+import sys
+
+# Angles a servo's configuration may hold, clamped to its limits once at boot so
+# they can be sent as they are afterwards
+GAIT_ANGLE_KEYS = ("neutral_angle", "swing_forward", "swing_backward", "lift_up", "lift_down")
+
+# A decorator to handle errors gracefully
+def handle_disconnection(func):
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except ServoTimeoutError as e:
+            print(f"Servo {e.id_} is not responding.")
+            sys.exit(1)
+        except ServoChecksumError:
+            print("Checksum error occurred while communicating with a servo.")
+            sys.exit(1)
+        except serial.serialutil.SerialException:
+            print("Serial port error. The motor might be disconnected.")
+            sys.exit(1)
+        except Exception as e:
+            print(f"An unexpected error occurred: {str(e)}.")
+            sys.exit(1)
+    return wrapper
+
+def clamp_angle(servos, servo_id, angle):
+    """Clamp the angle to the min and max limits of servos[servo_id]."""
+    config = servos[servo_id]
+    clamped = max(min(angle, config["max_angle"]), config["min_angle"])
+    if clamped != angle:
+        print(f"Warning: Angle {angle}° for Servo {servo_id} ({config['name']}) clamped to {clamped}° to stay within limits.")
+    return clamped
+
+def init_servos(servos, verify_limits=False):
+    """
+    Connect to each servo in servos and set its angle limits.
+
+    Each configuration gets its LX16A object under "servo", its min_angle and
+    max_angle are replaced by the limits the servo actually enforces, and its
+    neutral and gait angles (GAIT_ANGLE_KEYS) are clamped to them. With
+    verify_limits, the limits are read back from each servo to check they
+    were stored.
+    """
+    print("\nInitializing servos...")
+    for servo_id, config in servos.items():
+        try:
+            servo = LX16A(servo_id)
+            # LX16A() has just read the stored limits; only write them (to the
+            # servo's EEPROM) when they differ, compared in the servo's units
+            wanted_limits = [LX16A._to_servo_range(config[key]) for key in ("min_angle", "max_angle")]
+            if [LX16A._to_servo_range(angle) for angle in servo.get_angle_limits()] != wanted_limits:
+                servo.set_angle_limits(config["min_angle"], config["max_angle"])
+            # Cached by the library (rounded to the servo's 0.24° steps), so no bus
+            # read unless verifying
+            actual_min_angle, actual_max_angle = servo.get_angle_limits(poll_hardware=verify_limits)
+            config["servo"] = servo
+            # Update configuration with actual enforced limits from the servo
+            config["min_angle"] = actual_min_angle
+            config["max_angle"] = actual_max_angle
+
+            # Ensure neutral, swing and lift angles are within actual limits
+            for key in GAIT_ANGLE_KEYS:
+                if key in config:
+                    config[key] = clamp_angle(servos, servo_id, config[key])
+
+            print(f"Servo {servo_id} ({config['name']}) initialized with actual limits: "
+                  f"{actual_min_angle}° to {actual_max_angle}°")
+        except Exception as e:
+            print(f"Failed to initialize Servo {servo_id} ({config['name']}): {e}. Exiting...")
+            raise  # Let the caller's handle_disconnection deal with it
+
+def home_servos(servos):
+    """Bring every servo in servos to its neutral position, all with one group move."""
+    print("\nStarting homing sequence...")
+    try:
+        # Neutral angles were clamped by init_servos
+        move_group([(config["servo"], config["neutral_angle"]) for config in servos.values()])
+    except Exception as e:
+        print(f"Failed to home servos: {e}. Exiting...")
+        raise  # Let the caller's handle_disconnection deal with it
+    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    for servo_id, config in servos.items():
+        print(f"[{current_time}] Servo {servo_id} ({config['name']}) set to neutral position: {config['neutral_angle']}°")
+    print("Homing sequence completed.")
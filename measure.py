@@ -1,4 +1,5 @@
 from pylx16a.lx16a import *
+from servo_bus import discard_input, install_frame_reader, reduce_latency
 import time
 from datetime import datetime
 import sys
@@ -6,6 +7,12 @@ import serial
 
 # Initialize the servo connection
 LX16A.initialize("/dev/cu.usbserial-1130", 0.1)  # Adjust the port as needed for your system
+reduce_latency()
+install_frame_reader()
+# A larger driver receive buffer keeps a burst of replies from overflowing it
+# (only Windows lets the buffer size be set)
+if hasattr(LX16A._controller, "set_buffer_size"):
+    LX16A._controller.set_buffer_size(rx_size=16384, tx_size=4096)
 
 # Servo configuration: ID and names
 SERVOS = {
@@ -61,6 +68,8 @@ def handle_disconnection(func):
 def print_current_angles():
     current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
     print(f"\n[{current_time}] Current servo angles:")
+    # Stale bytes from an earlier failed read would desync this pass
+    discard_input()
     for servo_id, config in SERVOS.items():
         servo = config.get("servo")
         if servo:
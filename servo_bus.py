@@ -0,0 +1,331 @@
+from pylx16a.lx16a import *
+import os
+import selectors
+import struct
+import sys
+import threading
+
+# Every servo on the bus acts on packets sent to this ID
+BROADCAST_ID = 254
+
+# LX-16A command numbers used here
+MOVE_TIME_WAIT_WRITE = 7
+MOVE_START = 11
+
+# macOS ioctl setting how long (in microseconds) the serial driver holds
+# received bytes before passing them on: _IOW('T', 0, unsigned long)
+IOSSDATALAT = 0x80085400
+
+
+def reduce_latency():
+    """
+    Ask the USB-serial adapter to pass received bytes on after 1 ms.
+
+    FTDI adapters hold incoming bytes for up to 16 ms by default, which is
+    added to every reply read from a servo. On Linux the driver's low-latency
+    flag is set and, for FTDI adapters, the timer is lowered through sysfs;
+    other adapters (e.g. CH341) have no such timer, so there is nothing more
+    to do for them. On macOS the serial driver's data latency is set to 1 ms.
+    Where that isn't possible a warning says how to do it by hand. Returns
+    True if the latency was lowered.
+    """
+    controller = LX16A._controller
+    if sys.platform == "darwin":
+        try:
+            import fcntl
+            fcntl.ioctl(controller.fileno(), IOSSDATALAT, struct.pack("L", 1000))
+            return True
+        except OSError:
+            print(
+                f"Warning: could not lower the serial latency for {controller.port}. "
+                "Set the FTDI LatencyTimer to 1 instead (e.g. with FT_Prog)."
+            )
+            return False
+
+    lowered = False
+    try:
+        controller.set_low_latency_mode(True)
+        lowered = True
+    except (NotImplementedError, ValueError, AttributeError, OSError):
+        pass  # Not Linux, or the driver has no ASYNC_LOW_LATENCY flag
+
+    port = os.path.basename(os.path.realpath(controller.port))
+    try:
+        with open(f"/sys/bus/usb-serial/devices/{port}/latency_timer", "w") as f:
+            f.write("1")
+        return True
+    except FileNotFoundError:
+        return lowered  # Not an FTDI adapter, so there is no latency timer to lower
+    except OSError:
+        print(
+            f"Warning: could not lower the USB latency timer for {controller.port}. "
+            "Check write access to /sys/bus/usb-serial/devices/*/latency_timer."
+        )
+        return lowered
+
+
+def realtime_priority(priority=20, native_id=0):
+    """
+    Move a thread to the SCHED_FIFO real-time scheduling class.
+
+    Keeps other processes from delaying a control loop's next tick. Applies
+    to the calling thread, or to the thread with the given native_id (see
+    threading.Thread.native_id). Only Linux has SCHED_FIFO, and it needs root
+    or CAP_SYS_NICE; otherwise the thread keeps its normal priority. Returns
+    True if the policy was set.
+    """
+    if not hasattr(os, "sched_setscheduler"):
+        return False
+    try:
+        os.sched_setscheduler(native_id, os.SCHED_FIFO, os.sched_param(priority))
+        return True
+    except PermissionError:
+        print(
+            "Warning: no permission for real-time scheduling, so the control loop "
+            "runs at normal priority. Run as root or grant CAP_SYS_NICE to enable it."
+        )
+        return False
+
+
+# Bytes received after the end of the last frame read
+_rx_buffer = bytearray()
+
+# Watches the port for incoming bytes; None where the port has no file
+# descriptor to select on (Windows), in which case reads block instead
+_selector = None
+
+
+def _read_frame(num_bytes, servo_id):
+    """
+    Read one reply frame, waiting only as long as the frame needs.
+
+    Waits (with select() where the port allows it) for bytes to arrive, takes
+    everything that has arrived, and waits again only while the frame's
+    length byte says more is due.
+    Bytes before a 0x55 0x55 header and frames of the wrong length (left
+    over from an earlier, abandoned query) are skipped; bytes after the frame
+    are kept for the next call.
+    """
+    controller = LX16A._controller
+    expected_length = num_bytes + 6
+    while True:
+        start = _rx_buffer.find(b"\x55\x55")
+        if start < 0:
+            # Keep a trailing 0x55 in case it starts the next header
+            del _rx_buffer[: len(_rx_buffer) - _rx_buffer.endswith(b"\x55")]
+        elif start > 0:
+            del _rx_buffer[:start]
+
+        if start >= 0 and len(_rx_buffer) >= 4:
+            frame_length = _rx_buffer[3] + 3
+            if frame_length != expected_length:
+                del _rx_buffer[:1]
+                continue
+            if len(_rx_buffer) >= frame_length:
+                break
+
+        if _selector is not None:
+            ready = _selector.select(controller.timeout)
+            received = controller.read(controller.in_waiting) if ready else b""
+        else:
+            received = controller.read(1)
+        if not received:
+            raise ServoTimeoutError(
+                f"Servo {servo_id}: {len(_rx_buffer)} bytes (expected {num_bytes})",
+                servo_id,
+            )
+        _rx_buffer.extend(received)
+        if _selector is None:
+            waiting = controller.in_waiting
+            if waiting:
+                _rx_buffer.extend(controller.read(waiting))
+
+    frame = bytes(_rx_buffer[:expected_length])
+    del _rx_buffer[:expected_length]
+
+    if LX16A._checksum(frame[:-1]) != frame[-1]:
+        raise ServoChecksumError(f"Servo {servo_id}: bad checksum", servo_id)
+
+    return list(frame[5:-1])
+
+
+def install_frame_reader():
+    """Make every LX16A read use _read_frame instead of a fixed-size read."""
+    global _selector
+    _rx_buffer.clear()
+    if _selector is None:
+        try:
+            selector = selectors.DefaultSelector()
+            selector.register(LX16A._controller, selectors.EVENT_READ)
+            _selector = selector
+        except (AttributeError, ValueError, OSError):
+            pass  # No file descriptor to select on; keep blocking reads
+    LX16A._read_packet = staticmethod(_read_frame)
+
+
+def discard_input():
+    """Drop any received bytes not yet read, e.g. replies to an abandoned query."""
+    LX16A._controller.reset_input_buffer()
+    _rx_buffer.clear()
+
+
+def _frame(params):
+    """Wrap command parameters in the LX-16A header and append the checksum."""
+    packet = [0x55, 0x55, *params]
+    packet.append(LX16A._checksum(packet))
+    return packet
+
+
+def _move_frames(targets, time, skip_unchanged, resend=()):
+    """
+    Check and frame a delayed move for each (servo, angle) pair (see
+    group_packet). Servo IDs in resend are never skipped as unchanged.
+    Returns the frames by servo ID, in the order given.
+    """
+    frames = {}
+    moved = []
+    for servo, angle in targets:
+        servo_id = servo.get_id()
+        if not servo.is_torque_enabled():
+            raise ServoLogicalError(
+                f"Servo {servo_id}: torque must be enabled to move", servo_id
+            )
+        if servo.is_motor_mode():
+            raise ServoLogicalError(
+                f"Servo {servo_id}: motor mode must be disabled to control movement",
+                servo_id,
+            )
+
+        lower_limit, upper_limit = servo.get_angle_limits()
+        LX16A._check_within_limits(angle, 0, 240, "angle", servo_id)
+        LX16A._check_within_limits(angle, lower_limit, upper_limit, "angle", servo_id)
+
+        raw_angle = LX16A._to_servo_range(angle)
+        if skip_unchanged and raw_angle == servo._commanded_angle and servo_id not in resend:
+            continue
+        frames[servo_id] = bytes(
+            _frame(
+                [
+                    servo_id,
+                    7,
+                    MOVE_TIME_WAIT_WRITE,
+                    *LX16A._to_bytes(raw_angle),
+                    *LX16A._to_bytes(time),
+                ]
+            )
+        )
+        moved.append((servo, raw_angle))
+
+    # Keep the library's view of each servo in sync with what is sent
+    for servo, raw_angle in moved:
+        servo._commanded_angle = raw_angle
+
+    return frames
+
+
+# Broadcast MoveStart: every servo starts the move queued on it
+_MOVE_START_FRAME = bytes(_frame([BROADCAST_ID, 3, MOVE_START]))
+
+
+def group_packet(targets, time=0, skip_unchanged=False):
+    """
+    Build the bytes for moving several servos at once.
+
+    Each (servo, angle) pair is queued on its servo as a delayed move (the
+    same command LX16A.move(..., wait=True) sends) and one broadcast
+    MoveStart follows, so the whole group starts on the same tick. Angles are
+    checked exactly like LX16A.move does, and the servos' commanded angles are
+    updated to the new targets. With skip_unchanged, servos already commanded
+    to their target (in the servo's 0.24° steps) are left out. Returns empty
+    bytes if there is nothing to send.
+    """
+    frames = _move_frames(targets, time, skip_unchanged)
+    if not frames:
+        return b""
+    return b"".join(frames.values()) + _MOVE_START_FRAME
+
+
+def move_group(targets, time=0):
+    """
+    Move several servos with a single serial write (see group_packet).
+
+    Servos already commanded to their target are left out of the write.
+    """
+    packet = group_packet(targets, time, skip_unchanged=True)
+    if packet:
+        LX16A._controller.write(packet)
+
+
+class GroupWriter:
+    """
+    Background thread that writes group moves to the bus.
+
+    submit() checks and frames a move on the caller's thread and returns
+    without touching the port, so a control loop keeps its pace while the OS
+    serial driver is busy. Moves waiting to be written are merged into one
+    group move in which each servo keeps only its newest target: when the
+    port falls behind, stale targets are dropped, since a stale pose is of no
+    use, but no servo's latest target is lost. A write error is raised from
+    the next submit() or drain() call, and the servos whose moves it lost are
+    sent their next target even when it is unchanged.
+    """
+
+    def __init__(self):
+        self._pending = {}  # Servo ID -> its newest move frame not yet written
+        self._unsent = set()  # Servo IDs whose last move was lost to a write error
+        self._condition = threading.Condition()
+        self._writing = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, targets, time=0, skip_unchanged=False):
+        """
+        Queue a group move (see group_packet) for the writer thread.
+
+        With skip_unchanged, servos already commanded to their target are left
+        out; their last target is either written already or still waiting.
+        """
+        self._raise_error()
+        with self._condition:
+            resend = set(self._unsent)
+        frames = _move_frames(targets, time, skip_unchanged, resend)
+        if frames:
+            with self._condition:
+                self._pending.update(frames)
+                self._unsent.difference_update(frames)
+                self._condition.notify_all()
+
+    def realtime_priority(self, priority=20):
+        """Move the writer thread to real-time scheduling (see realtime_priority)."""
+        return realtime_priority(priority, self._thread.native_id)
+
+    def drain(self):
+        """Block until every queued move has been written."""
+        with self._condition:
+            self._condition.wait_for(lambda: not self._pending and not self._writing)
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                packet = b"".join(self._pending.values()) + _MOVE_START_FRAME
+                servo_ids = set(self._pending)
+                self._pending.clear()
+                self._writing = True
+            try:
+                LX16A._controller.write(packet)
+                servo_ids.clear()
+            except Exception as e:
+                self._error = e
+            with self._condition:
+                # Their commanded angles say these moves were sent; they weren't
+                self._unsent.update(servo_ids)
+                self._writing = False
+                self._condition.notify_all()
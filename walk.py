@@ -1,13 +1,25 @@
-from math import sin, cos, pi, ceil
+from math import ceil, floor
 from pylx16a.lx16a import *
-import time
+from gait_common import clamp_angle, init_servos
+from servo_bus import GroupWriter, move_group, realtime_priority, reduce_latency
 from datetime import datetime
+import time
+import logging
+import logging.handlers
+import atexit
+import functools
+import queue
 import serial.serialutil
 import threading
+import select
+import os
 import sys
 
 # Initialize the servo connection
+# The LX-16A only talks at 115200 baud, so the link can't be sped up; at that
+# rate a 4-servo group move (46 bytes) takes about 4 ms on the wire
 LX16A.initialize("/dev/cu.usbserial-130", 0.1)  # macOS
+reduce_latency()
 
 # Servo configuration: ID and angle limits
 # Note: Adjust 'swing_backward', 'swing_forward', 'lift_down', and 'lift_up' as per your robot's design
@@ -78,18 +90,48 @@ SERVOS = {
     },
 }
 
+# Read angle limits back from each servo at boot to check they were stored
+VERIFY_LIMITS = False
+
+# Log every group of servo moves as one timestamped line. Off by default, since
+# printing to a slow terminal can hold up the walking loop
+LOG_MOVES = False
+
+logging.basicConfig(level=logging.INFO if LOG_MOVES else logging.WARNING, stream=sys.stdout,
+                    format="[%(asctime)s.%(msecs)03d] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+logger = logging.getLogger("walk")
+# Move log records (timestamped when logged) go to a background thread that formats
+# and prints them, so the walking thread never waits on the terminal
+move_log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(move_log_queue))
+logger.propagate = False
+move_log_listener = logging.handlers.QueueListener(move_log_queue, *logging.getLogger().handlers)
+move_log_listener.start()
+atexit.register(move_log_listener.stop)  # Print whatever is still queued
+
 GROUP_A = [3, 4, 7, 8]  # Front Left and Back Right
 GROUP_B = [1, 2, 5, 6]  # Back Left and Front Right
 
-# Define custom exceptions if they are not part of pylx16a
-# If pylx16a.lx16a already defines these, you can remove these definitions
-class ServoTimeoutError(Exception):
-    def __init__(self, id_):
-        self.id_ = id_
-        super().__init__(f"Servo {id_} timed out.")
+# Each group's Top servos as (servo_id, servo, lift_up, lift_down), filled in by boot_sequence
+GROUP_A_TOP = []
+GROUP_B_TOP = []
+
+# (servo_id, angle) for every servo's neutral position, filled in by boot_sequence
+NEUTRAL_ANGLES = []
+
+# Sends walking and fine-tuning group moves from a background thread
+group_writer = GroupWriter()
+
+class ServoBusFatal(SystemExit):
+    """Raised on the main thread to end the program after a servo bus error."""
 
-class ServoChecksumError(Exception):
-    pass
+# Set when a worker thread stops because of a servo bus error, so the main
+# thread shuts down instead of trying to home the robot over a dead bus
+bus_failed = threading.Event()
+
+# Errors that mean the servo bus itself has failed, which handle_disconnection
+# turns into a shutdown; handlers further in must let these through
+BUS_ERRORS = (ServoTimeoutError, ServoChecksumError, serial.serialutil.SerialException)
 
 # A decorator to handle errors gracefully
 def handle_disconnection(func):
@@ -100,28 +142,31 @@ def handle_disconnection(func):
             print(f"Servo {e.id_} is not responding.")
             if threading.current_thread() == threading.main_thread():
                 print("Exiting program due to servo timeout.")
-                quit()
+                raise ServoBusFatal(1) from e
             else:
                 print("Exiting thread due to servo timeout.")
-        except ServoChecksumError:
+                bus_failed.set()
+        except ServoChecksumError as e:
             print("Checksum error occurred while communicating with a servo.")
             if threading.current_thread() == threading.main_thread():
                 print("Exiting program due to checksum error.")
-                quit()
+                raise ServoBusFatal(1) from e
             else:
                 print("Exiting thread due to checksum error.")
-        except serial.serialutil.SerialException:
+                bus_failed.set()
+        except serial.serialutil.SerialException as e:
             print("Serial port error. The motor might be disconnected.")
             if threading.current_thread() == threading.main_thread():
                 print("Exiting program due to serial port error.")
-                quit()
+                raise ServoBusFatal(1) from e
             else:
                 print("Exiting thread due to serial port error.")
+                bus_failed.set()
         except Exception as e:
             print(f"An unexpected error occurred: {str(e)}.")
             if threading.current_thread() == threading.main_thread():
                 print("Exiting program due to unexpected error.")
-                quit()
+                raise ServoBusFatal(1) from e
             else:
                 print("Exiting thread due to unexpected error.")
     return wrapper
@@ -129,119 +174,152 @@ def handle_disconnection(func):
 @handle_disconnection
 def boot_sequence():
     """Initialize servos and set angle limits."""
-    print("Initializing servos...")
-    for servo_id, config in SERVOS.items():
-        try:
-            servo = LX16A(servo_id)
-            servo.set_angle_limits(config["min_angle"], config["max_angle"])
-            actual_min_angle, actual_max_angle = servo.get_angle_limits()
-            config["servo"] = servo
-            # Update configuration with actual enforced limits from the servo
-            config["min_angle"] = actual_min_angle
-            config["max_angle"] = actual_max_angle
-            print(f"Servo {servo_id} ({config['name']}) initialized with actual limits: "
-                  f"{actual_min_angle}° to {actual_max_angle}°")
-        except Exception as e:
-            print(f"Failed to initialize Servo {servo_id} ({config['name']}): {e}. Exiting...")
-            raise  # Let the decorator handle the exception
+    # Bottom servos swing the leg, Top servos lift it; decided once here
+    for config in SERVOS.values():
+        config["is_bottom"] = "Bottom" in config["name"]
+
+    # Bottom servos rest midway through their configured swing, Top servos with
+    # the leg down. Worked out before init_servos clamps the angles, so clamping
+    # doesn't move the home pose; only the result is clamped
+    home_angles = {servo_id: (config["swing_backward"] + config["swing_forward"]) / 2
+                   if config["is_bottom"] else config["lift_down"]
+                   for servo_id, config in SERVOS.items()}
+
+    # init_servos goes through the servos one at a time on purpose: they share
+    # one half-duplex bus and LX16A() is a series of query/reply pairs, so
+    # initializing them from parallel threads would only interleave replies.
+    # It also clamps the swing and lift angles to the limits the servos report,
+    # so a badly configured angle can't make a group move fail while walking.
+    init_servos(SERVOS, verify_limits=VERIFY_LIMITS)
+
+    NEUTRAL_ANGLES[:] = [(servo_id, clamp_angle(SERVOS, servo_id, angle))
+                         for servo_id, angle in home_angles.items()]
+
+    # Look up what lift_legs/lower_legs need once, instead of on every call
+    for group, group_top in ((GROUP_A, GROUP_A_TOP), (GROUP_B, GROUP_B_TOP)):
+        group_top[:] = [(servo_id, SERVOS[servo_id]["servo"], SERVOS[servo_id]["lift_up"],
+                         SERVOS[servo_id]["lift_down"])
+                        for servo_id in group if not SERVOS[servo_id]["is_bottom"]]
 
 @handle_disconnection
 def homing_sequence():
     """Bring all servos to their neutral positions."""
     print("Starting homing sequence...")
-    for servo_id, config in SERVOS.items():
-        try:
-            if "Bottom" in config["name"]:
-                neutral_angle = (config["swing_backward"] + config["swing_forward"]) / 2
-            else:
-                neutral_angle = config["lift_down"]  # Legs down in neutral position
-            config["servo"].move(neutral_angle)
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            print(f"[{current_time}] Servo {servo_id} ({config['name']}) set to neutral position: {neutral_angle}°")
-        except Exception as e:
-            print(f"Failed to home Servo {servo_id} ({config['name']}): {e}. Exiting...")
-            raise  # Let the decorator handle the exception
+    try:
+        # All servos are sent home in one write and start together
+        move_group([(SERVOS[servo_id]["servo"], angle) for servo_id, angle in NEUTRAL_ANGLES])
+    except Exception as e:
+        print(f"Failed to home servos: {e}. Exiting...")
+        raise  # Let the decorator handle the exception
+    # Homing isn't on the walking path, so it always prints, like the other gait scripts
+    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    for servo_id, neutral_angle in NEUTRAL_ANGLES:
+        print(f"[{current_time}] Servo {servo_id} ({SERVOS[servo_id]['name']}) set to neutral position: {neutral_angle}°")
     print("Homing sequence completed.")
 
+def log_moves(action, angles):
+    """Log a single line for a group of moves given as (servo_id, angle) pairs."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("%s: %s", action, ", ".join(
+            f"Servo {servo_id} ({SERVOS[servo_id]['name']}) {angle:.2f}°" for servo_id, angle in angles))
+
 def generate_angles(start, stop, step):
     """
-    Generator to yield angles from start to stop with the given step.
+    List the angles from start to stop with the given step.
     Handles both increasing and decreasing sequences.
     """
     if step == 0:
         raise ValueError("Step cannot be zero.")
-    elif step > 0:
-        current = start
-        while current <= stop:
-            yield current
-            current += step
-    else:
-        current = start
-        while current >= stop:
-            yield current
-            current += step
-
-@handle_disconnection
-def lift_legs(group):
-    """Lift the legs in the specified group."""
-    for servo_id in group:
-        config = SERVOS[servo_id]
-        if "Top" in config["name"]:
-            servo = config["servo"]
-            lift_up_angle = config["lift_up"]
-            servo.move(lift_up_angle)
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            print(f"[{current_time}] Servo {servo_id} ({config['name']}) lifted to {lift_up_angle}°")
-
-@handle_disconnection
-def lower_legs(group):
-    """Lower the legs in the specified group."""
-    for servo_id in group:
-        config = SERVOS[servo_id]
-        if "Top" in config["name"]:
-            servo = config["servo"]
-            lift_down_angle = config["lift_down"]
-            servo.move(lift_down_angle)
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            print(f"[{current_time}] Servo {servo_id} ({config['name']}) lowered to {lift_down_angle}°")
+    # Each angle is computed from its index, so rounding errors don't add up
+    count = floor((stop - start) / step + 1e-9) + 1
+    return [start + i * step for i in range(max(count, 0))]
+
+def lift_legs(group_top):
+    """Lift the legs whose Top servos are given (GROUP_A_TOP or GROUP_B_TOP)."""
+    group_writer.submit([(servo, lift_up) for _, servo, lift_up, _ in group_top])
+    log_moves("Lifted", [(servo_id, lift_up) for servo_id, _, lift_up, _ in group_top])
+
+def lower_legs(group_top):
+    """Lower the legs whose Top servos are given (GROUP_A_TOP or GROUP_B_TOP)."""
+    group_writer.submit([(servo, lift_down) for _, servo, _, lift_down in group_top])
+    log_moves("Lowered", [(servo_id, lift_down) for servo_id, _, _, lift_down in group_top])
+
+@functools.lru_cache(maxsize=8)
+def _plan_swing(group, step_size):
+    """
+    Work out where each Bottom servo of a group (given as a tuple) starts and
+    ends its swing, as tuples of (servo_id, servo, angle), and the number of
+    steps in the longest swing.
 
-@handle_disconnection
-def swing_legs_forward(group, step_size, delay):
-    """Swing the legs forward in the specified group."""
-    angle_sequences = {}
+    The swing covers the whole steps that fit between swing_backward and
+    swing_forward, the same angles generate_angles would list. Nothing here
+    changes after boot_sequence, so each group's plan is only worked out once.
+    """
+    swing_start = []
+    swing_end = []
     max_steps = 0
-
-    # Generate angle sequences for each servo
     for servo_id in group:
         config = SERVOS[servo_id]
-        if "Bottom" in config["name"]:
+        if config["is_bottom"]:
             swing_backward_angle = config["swing_backward"]
             swing_forward_angle = config["swing_forward"]
             if swing_backward_angle < swing_forward_angle:
                 step = step_size
             else:
                 step = -step_size
-            angle_sequence = list(generate_angles(swing_backward_angle, swing_forward_angle, step))
-            angle_sequences[servo_id] = angle_sequence
-            if len(angle_sequence) > max_steps:
-                max_steps = len(angle_sequence)
-
-    # Move servos step by step
-    for step in range(max_steps):
-        for servo_id, angles in angle_sequences.items():
-            if step < len(angles):
-                angle = angles[step]
-                config = SERVOS[servo_id]
-                servo = config["servo"]
-                servo.move(angle)
-                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-                print(f"[{current_time}] Servo {servo_id} ({config['name']}) moved to {angle}°")
-        time.sleep(delay)
+            steps = floor((swing_forward_angle - swing_backward_angle) / step + 1e-9) + 1
+            swing_start.append((servo_id, config["servo"], swing_backward_angle))
+            swing_end.append((servo_id, config["servo"], swing_backward_angle + (steps - 1) * step))
+            max_steps = max(max_steps, steps)
+    return tuple(swing_start), tuple(swing_end), max_steps
+
+def swing_legs_forward(group, step_size, delay, stop_event=None):
+    """Swing the legs forward in the specified group, stopping early once stop_event is set."""
+    swing_start, swing_end, max_steps = _plan_swing(tuple(group), step_size)
+    if not swing_start:
+        return
+
+    # The swing is sent as two timed group moves instead of one move per step:
+    # back to the first angle within one step's time, then on to the last angle
+    # over the time the remaining steps would take, which the servos interpolate
+    # themselves. Waits run to absolute deadlines, so the time spent submitting
+    # doesn't add up, and return early once stop_event is set.
+    waypoints = [
+        ("Swing start", swing_start, delay),
+        ("Swing end", swing_end, (max_steps - 1) * delay),
+    ]
+    deadline = time.monotonic()
+    for action, moves, duration in waypoints:
+        group_writer.submit([(servo, angle) for _, servo, angle in moves], round(duration * 1000))
+        if LOG_MOVES:
+            log_moves(action, [(servo_id, angle) for servo_id, _, angle in moves])
+        deadline += duration
+        remaining = max(deadline - time.monotonic(), 0)
+        if stop_event is None:
+            time.sleep(remaining)
+        elif stop_event.wait(remaining):
+            return
+
+def _stride(group, group_top, step_size, delay, stop_event):
+    """
+    Lift, swing and lower one group's legs.
+
+    The three phases aren't decorated themselves: an error in any of them
+    ends the stride and reaches walk(), instead of being reported and
+    skipped on its own while the next phase runs anyway.
+    """
+    lift_legs(group_top)
+    swing_legs_forward(group, step_size, delay, stop_event)
+    lower_legs(group_top)
 
 @handle_disconnection
 def walk(stop_event):
     """Simulate walking by moving groups alternately."""
     print("Starting walking loop. Press Ctrl+C to stop and return to homing.")
+    # Steadier step timing where the OS allows it, both for this thread's pacing
+    # and for the writer thread that puts its moves on the bus
+    if realtime_priority():
+        group_writer.realtime_priority()
     step_size = 5.0  # Degrees to move in each step
     delay = 0.2  # Seconds between steps
 
@@ -251,26 +329,37 @@ def walk(stop_event):
             if stop_event.is_set():
                 break
             print("Group A is moving")
-            lift_legs(GROUP_A)
-            swing_legs_forward(GROUP_A, step_size, delay)
-            lower_legs(GROUP_A)
+            _stride(GROUP_A, GROUP_A_TOP, step_size, delay, stop_event)
 
-            # Wait briefly
-            time.sleep(1.5)
+            # Wait briefly, waking up immediately if asked to stop
+            stop_event.wait(1.5)
 
             # Move Group B
             if stop_event.is_set():
                 break
             print("Group B is moving")
-            lift_legs(GROUP_B)
-            swing_legs_forward(GROUP_B, step_size, delay)
-            lower_legs(GROUP_B)
+            _stride(GROUP_B, GROUP_B_TOP, step_size, delay, stop_event)
 
-            # Wait briefly
-            time.sleep(1.5)
+            # Wait briefly, waking up immediately if asked to stop
+            stop_event.wait(1.5)
     except Exception as e:
         print(f"Error in walk function: {e}")
-        # Do not call quit() here; the decorator handles it based on the thread
+        raise  # The decorator decides what to do based on the thread
+    finally:
+        # Let queued moves reach the servos before anything else uses the port
+        group_writer.drain()
+
+def fine_tune_path(bottom_angles):
+    """Pair each Front Left Bottom angle with its Front Left Top angle, both within actual limits."""
+    bottom_min, bottom_max = SERVOS[3]["min_angle"], SERVOS[3]["max_angle"]
+    top_min, top_max = SERVOS[4]["min_angle"], SERVOS[4]["max_angle"]
+    path = []
+    for angle_bottom in bottom_angles:
+        angle_bottom = max(min(angle_bottom, bottom_max), bottom_min)
+        angle_top = angle_bottom - 50  # Adjust based on mechanical design
+        angle_top = max(min(angle_top, top_max), top_min)
+        path.append((angle_bottom, angle_top))
+    return path
 
 @handle_disconnection
 def fine_tune_front_left_leg(stop_event):
@@ -283,68 +372,98 @@ def fine_tune_front_left_leg(stop_event):
     lift_angle_bottom = SERVOS[3]["max_angle"]  # Maximum angle to lift
     lower_angle_bottom = ceil(SERVOS[3]["min_angle"])  # Minimum angle to lower, rounded up to avoid exceeding
 
-    lift_angle_top = SERVOS[4]["lift_up"]     # Maximum angle to lift
-    lower_angle_top = SERVOS[4]["lift_down"]    # Minimum angle to lower
-
     step = 5.0  # Degrees to move in each step
     delay_time = 0.5  # Seconds between steps
+    # Each move is spread over the whole step so the leg moves continuously
+    move_time = round(delay_time * 1000)  # Milliseconds
+
+    # Both directions are computed and clamped once, not on every pass
+    lift_path = fine_tune_path(generate_angles(lower_angle_bottom, lift_angle_bottom, step))
+    lower_path = fine_tune_path(generate_angles(lift_angle_bottom, lower_angle_bottom, -step))
 
+    # Steps are paced against absolute deadlines so logging and submitting don't add drift
+    submit = group_writer.submit
+    monotonic = time.monotonic
+    deadline = monotonic()
     try:
         while not stop_event.is_set():
             # Lift the front left leg
             print("Lifting Front Left Leg...")
-            for angle_bottom in generate_angles(lower_angle_bottom, lift_angle_bottom, step):
+            for angle_bottom, angle_top in lift_path:
                 if stop_event.is_set():
                     break
                 try:
-                    # Ensure angles do not exceed actual limits
-                    angle_bottom = min(angle_bottom, SERVOS[3]["max_angle"])
-                    angle_top = angle_bottom - 50  # Adjust based on mechanical design
-                    angle_top = max(angle_top, SERVOS[4]["min_angle"])
-                    angle_top = min(angle_top, SERVOS[4]["max_angle"])
+                    submit([(servo_bottom, angle_bottom), (servo_top, angle_top)], move_time)
 
-                    servo_bottom.move(angle_bottom)
-                    servo_top.move(angle_top)
-
-                    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-                    print(f"[{current_time}] Servo 3 moved to {angle_bottom}°, Servo 4 moved to {angle_top}°")
+                    log_moves("Moved", [(3, angle_bottom), (4, angle_top)])
+                except BUS_ERRORS:
+                    raise  # Let the decorator shut down
                 except Exception as e:
                     print(f"Error during fine-tuning: {e}. Exiting fine-tune mode.")
                     stop_event.set()
                     break
 
-                time.sleep(delay_time)
+                deadline += delay_time
+                stop_event.wait(max(deadline - monotonic(), 0))
 
             if stop_event.is_set():
                 break
 
             # Lower the front left leg
             print("Lowering Front Left Leg...")
-            for angle_bottom in generate_angles(lift_angle_bottom, lower_angle_bottom, -step):
+            for angle_bottom, angle_top in lower_path:
                 if stop_event.is_set():
                     break
                 try:
-                    # Ensure angles do not go below actual limits
-                    angle_bottom = max(angle_bottom, SERVOS[3]["min_angle"])
-                    angle_top = angle_bottom - 50  # Adjust based on mechanical design
-                    angle_top = max(angle_top, SERVOS[4]["min_angle"])
-                    angle_top = min(angle_top, SERVOS[4]["max_angle"])
-
-                    servo_bottom.move(angle_bottom)
-                    servo_top.move(angle_top)
+                    submit([(servo_bottom, angle_bottom), (servo_top, angle_top)], move_time)
 
-                    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-                    print(f"[{current_time}] Servo 3 moved to {angle_bottom}°, Servo 4 moved to {angle_top}°")
+                    log_moves("Moved", [(3, angle_bottom), (4, angle_top)])
+                except BUS_ERRORS:
+                    raise  # Let the decorator shut down
                 except Exception as e:
                     print(f"Error during fine-tuning: {e}. Exiting fine-tune mode.")
                     stop_event.set()
                     break
 
-                time.sleep(delay_time)
+                deadline += delay_time
+                stop_event.wait(max(deadline - monotonic(), 0))
 
+    except BUS_ERRORS:
+        raise  # Let the decorator shut down
     except Exception as e:
         print(f"Error during fine-tuning: {e}. Exiting fine-tune mode.")
         stop_event.set()
+    finally:
+        # Let queued moves reach the servos before anything else uses the port
+        group_writer.drain()
+
+def wait_for_enter(stop_event=None):
+    """
+    Wait until Enter is pressed, polling stdin instead of blocking in input().
+
+    The wait stays responsive to Ctrl+C and, if given, returns False as soon
+    as stop_event is set; returns True once Enter is pressed. stdin is read a
+    byte at a time straight from its file descriptor, so a second, quick Enter
+    stays queued for the next wait instead of vanishing into Python's buffer
+    where select() can't see it. Raises EOFError when stdin is closed, like
+    input() does.
+    """
+    print("\nPress Enter to proceed to the next movement...", end="", flush=True)
+    # select() can't poll the console on Windows, and piped input may already
+    # be sitting in sys.stdin's buffer, read ahead by the menu's input()
+    if sys.platform == "win32" or not sys.stdin.isatty():
+        input()
+        return True
+    fd = sys.stdin.fileno()
+    while stop_event is None or not stop_event.is_set():
+        ready, _, _ = select.select([fd], [], [], 0.05)
+        if ready:
+            char = os.read(fd, 1)
+            if not char:
+                raise EOFError
+            if char == b"\n":
+                return True
+    return False
 
 @handle_disconnection
 def walk_step_by_step():
@@ -374,21 +493,21 @@ def walk_step_by_step():
         lift_up_angle = SERVOS[top_servo_id]['lift_up']
         top_servo.move(lift_up_angle)
         print(f"Top Servo {top_servo_id} moved to {lift_up_angle}°")
-        input("\nPress Enter to proceed to the next movement...")
+        wait_for_enter()
 
         # Swing the leg forward
         print(f"Swinging {leg_name} leg forward.")
         swing_forward_angle = SERVOS[bottom_servo_id]['swing_forward']
         bottom_servo.move(swing_forward_angle)
         print(f"Bottom Servo {bottom_servo_id} moved to {swing_forward_angle}°")
-        input("\nPress Enter to proceed to the next movement...")
+        wait_for_enter()
 
         # Lower the leg
         print(f"Lowering {leg_name} leg.")
         lift_down_angle = SERVOS[top_servo_id]['lift_down']
         top_servo.move(lift_down_angle)
         print(f"Top Servo {top_servo_id} moved to {lift_down_angle}°")
-        input("\nPress Enter to proceed to the next movement...")
+        wait_for_enter()
 
     print("Step-by-step walking mode completed.")
 
@@ -428,6 +547,9 @@ def main():
                 stop_event.set()
                 walk_thread.join()
 
+            if bus_failed.is_set():
+                raise ServoBusFatal(1)
+
             homing_sequence()  # Call homing sequence after walking loop ends
             print("Walking mode terminated gracefully.")
 
@@ -447,6 +569,9 @@ def main():
                 stop_event.set()
                 fine_tune_thread.join()
 
+            if bus_failed.is_set():
+                raise ServoBusFatal(1)
+
             homing_sequence()  # Call homing sequence after fine-tune loop ends
             print("Fine-tuning mode terminated gracefully.")
 
@@ -464,5 +589,18 @@ def main():
         else:
             print("Invalid choice. Please enter 1, 2, 3, or 4.")
 
+def close_port():
+    """Close the serial port at once, dropping anything not yet sent."""
+    try:
+        LX16A._controller.reset_output_buffer()
+        LX16A._controller.close()
+    except (OSError, serial.serialutil.SerialException):
+        pass  # The adapter is already gone
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except ServoBusFatal:
+        # Don't let interpreter teardown wait on a port that has stopped draining
+        close_port()
+        raise
\ No newline at end of file
@@ -1,14 +1,20 @@
 from math import sin, cos, pi
 from pylx16a.lx16a import *
+from gait_common import handle_disconnection, home_servos, init_servos
+from servo_bus import GroupWriter, reduce_latency
 import time
-from datetime import datetime
-import serial.serialutil
 import sys
 
 # Initialize the servo connection
 LX16A.initialize("/dev/cu.usbserial-130", 0.1)  # macOS
+reduce_latency()
 
 FREQUENCY = 1.5  # 0.5 Controls speed of walking
+TICK_TIME = 0.05  # Seconds between servo updates while walking
+
+# Print the servo angles every this many ticks. Printing on every tick can hold
+# up the walking loop on a slow terminal
+TELEMETRY_EVERY = 10
 
 # Predefined range of motion offsets
 BOTTOM_SWING_FORWARD_OFFSET = 40.0
@@ -89,41 +95,26 @@ SERVOS = {
     },   
 }
 
+# Servo IDs in the order their angles are printed
+SORTED_SERVO_IDS = sorted(SERVOS)
+
 # Define the legs and their servos
+# Diagonal legs move together: Front Left with Back Right, Front Right with Back Left
 LEGS = [
-    {'name': 'Front Left', 'top_servo_id': 4, 'bottom_servo_id': 3},
-    {'name': 'Front Right', 'top_servo_id': 6, 'bottom_servo_id': 5},
-    {'name': 'Back Left', 'top_servo_id': 2, 'bottom_servo_id': 1},
-    {'name': 'Back Right', 'top_servo_id': 8, 'bottom_servo_id': 7},
+    {'name': 'Front Left', 'top_servo_id': 4, 'bottom_servo_id': 3, 'phase_shift': 0},
+    {'name': 'Front Right', 'top_servo_id': 6, 'bottom_servo_id': 5, 'phase_shift': pi},
+    {'name': 'Back Left', 'top_servo_id': 2, 'bottom_servo_id': 1, 'phase_shift': pi},
+    {'name': 'Back Right', 'top_servo_id': 8, 'bottom_servo_id': 7, 'phase_shift': 0},
 ]
 
-# Define custom exceptions if they are not part of pylx16a
-class ServoTimeoutError(Exception):
-    def __init__(self, id_):
-        self.id_ = id_
-        super().__init__(f"Servo {id_} timed out.")
-
-class ServoChecksumError(Exception):
-    pass
-
-# A decorator to handle errors gracefully
-def handle_disconnection(func):
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except ServoTimeoutError as e:
-            print(f"Servo {e.id_} is not responding.")
-            sys.exit(1)
-        except ServoChecksumError:
-            print("Checksum error occurred while communicating with a servo.")
-            sys.exit(1)
-        except serial.serialutil.SerialException:
-            print("Serial port error. The motor might be disconnected.")
-            sys.exit(1)
-        except Exception as e:
-            print(f"An unexpected error occurred: {str(e)}.")
-            sys.exit(1)
-    return wrapper
+# The gait is periodic, so its servo targets are worked out once for one full cycle.
+# GAIT_TABLE[k] holds the (servo, angle) targets at phase 2*pi*k/len(GAIT_TABLE),
+# already clamped to the servos' limits, for servos in SORTED_SERVO_IDS order; filled
+# in by boot_sequence
+GAIT_TABLE = []
+
+# Sends each tick's servo targets from a background thread
+group_writer = GroupWriter()
 
 def configure_servos(servos):
     """
@@ -183,143 +174,129 @@ def configure_all_servos():
 @handle_disconnection
 def boot_sequence():
     """Initialize servos and set angle limits."""
-    print("\nInitializing servos...")
-    for servo_id, config in SERVOS.items():
-        try:
-            servo = LX16A(servo_id)
-            servo.set_angle_limits(config["min_angle"], config["max_angle"])
-            actual_min_angle, actual_max_angle = servo.get_angle_limits()
-            config["servo"] = servo
-            # Update configuration with actual enforced limits from the servo
-            config["min_angle"] = actual_min_angle
-            config["max_angle"] = actual_max_angle
-
-            # Ensure swing and lift angles are within actual limits
-            if config["type"] == "bottom":
-                config["swing_forward"] = clamp_angle(
-                    servo_id, config["swing_forward"]
-                )
-                config["swing_backward"] = clamp_angle(
-                    servo_id, config["swing_backward"]
-                )
-            elif config["type"] == "top":
-                config["lift_up"] = clamp_angle(servo_id, config["lift_up"])
-                config["lift_down"] = clamp_angle(servo_id, config["lift_down"])
-
-            # Compute AMPLITUDE and OFFSET for smooth gait
-            if 'swing_forward' in config and 'swing_backward' in config:
-                swing_forward = config['swing_forward']
-                swing_backward = config['swing_backward']
-                AMPLITUDE = (swing_forward - swing_backward) / 2
-                OFFSET = (swing_forward + swing_backward) / 2
-                config['AMPLITUDE'] = AMPLITUDE
-                config['OFFSET'] = OFFSET
-
-            elif 'lift_up' in config and 'lift_down' in config:
-                lift_up = config['lift_up']
-                lift_down = config['lift_down']
-                AMPLITUDE = (lift_up - lift_down) / 2
-                OFFSET = (lift_up + lift_down) / 2
-                config['AMPLITUDE'] = AMPLITUDE
-                config['OFFSET'] = OFFSET
-
-            print(f"Servo {servo_id} ({config['name']}) initialized with actual limits: "
-                  f"{actual_min_angle}° to {actual_max_angle}°")
-        except Exception as e:
-            print(f"Failed to initialize Servo {servo_id} ({config['name']}): {e}. Exiting...")
-            raise  # Let the decorator handle the exception
+    init_servos(SERVOS)
+
+    # Compute AMPLITUDE and OFFSET for smooth gait
+    for config in SERVOS.values():
+        if config["type"] == "bottom":
+            forward, backward = config["swing_forward"], config["swing_backward"]
+        else:
+            forward, backward = config["lift_up"], config["lift_down"]
+        config["AMPLITUDE"] = (forward - backward) / 2
+        config["OFFSET"] = (forward + backward) / 2
+
+    build_gait_table()
+
+def _gait_half(phase):
+    """
+    Return (swinging, s): whether the leg is in the swing half of the gait cycle
+    at this phase, and how far through that half it is, from 0 to 1. The swing
+    half runs from phase -pi/2 to pi/2, where sin(phase) rises from -1 to 1.
+    """
+    u = (phase + pi / 2) % (2 * pi)
+    return u < pi, (u % pi) / pi
+
+def cycloid(s):
+    """Cycloidal progress from 0 to 1 as s goes from 0 to 1, starting and ending at rest."""
+    return s - sin(2 * pi * s) / (2 * pi)
+
+def swing_wave(phase):
+    """
+    Swing (Bottom) servo position from -1 (swung back) to 1 (swung forward).
+
+    Moves forward during the swing half and back during the stance half, each
+    along a cycloid, so the leg starts and stops each stroke without a jerk.
+    """
+    swinging, s = _gait_half(phase)
+    progress = cycloid(s)
+    return 2 * progress - 1 if swinging else 1 - 2 * progress
+
+def lift_wave(phase):
+    """
+    Lift (Top) servo position from -1 (leg down) to 1 (leg lifted).
+
+    Rises and falls along a raised cosine during the swing half, peaking as the
+    leg passes mid-swing, and stays down for the whole stance half.
+    """
+    swinging, s = _gait_half(phase)
+    return -cos(2 * pi * s) if swinging else -1.0
+
+def build_gait_table():
+    """
+    Sample one gait cycle into GAIT_TABLE, about one sample per tick. Warns here
+    about any servo whose wave leaves its limits, instead of on every tick it
+    gets clamped.
+    """
+    samples = max(round(2 * pi / (FREQUENCY * TICK_TIME)), 1)
+    waves = {}
+    for leg in LEGS:
+        phase_shift = leg['phase_shift']
+        for servo_id, wave in ((leg['top_servo_id'], lift_wave), (leg['bottom_servo_id'], swing_wave)):
+            config = SERVOS[servo_id]
+            amplitude = config['AMPLITUDE']
+            offset = config['OFFSET']
+            min_angle = config["min_angle"]
+            max_angle = config["max_angle"]
+
+            reach = abs(amplitude)
+            if offset - reach < min_angle or offset + reach > max_angle:
+                print(f"Warning: Servo {servo_id} ({config['name']}) swings between "
+                      f"{offset - reach:.2f}° and {offset + reach:.2f}° and will be clamped "
+                      f"to {min_angle}° to {max_angle}°.")
+
+            waves[servo_id] = [max(min(amplitude * wave(2 * pi * k / samples + phase_shift) + offset,
+                                       max_angle), min_angle)
+                               for k in range(samples)]
+
+    servos = [SERVOS[servo_id]['servo'] for servo_id in SORTED_SERVO_IDS]
+    GAIT_TABLE[:] = [list(zip(servos, angles))
+                     for angles in zip(*(waves[servo_id] for servo_id in SORTED_SERVO_IDS))]
 
 @handle_disconnection
 def homing_sequence():
     """Bring all servos to their neutral positions."""
-    print("\nStarting homing sequence...")
-    for servo_id, config in SERVOS.items():
-        try:
-            neutral_angle = config["neutral_angle"]
-            # Clamp the neutral_angle within servo limits
-            neutral_angle = clamp_angle(servo_id, neutral_angle)
-            config["servo"].move(neutral_angle)
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            print(f"[{current_time}] Servo {servo_id} ({config['name']}) set to neutral position: {neutral_angle}°")
-        except Exception as e:
-            print(f"Failed to home Servo {servo_id} ({config['name']}): {e}. Exiting...")
-            raise  # Let the decorator handle the exception
-    print("Homing sequence completed.")
-
-def clamp_angle(servo_id, angle):
-    """Clamp the angle to the servo's min and max limits."""
-    min_angle = SERVOS[servo_id]["min_angle"]
-    max_angle = SERVOS[servo_id]["max_angle"]
-    clamped = max(min(angle, max_angle), min_angle)
-    if clamped != angle:
-        print(f"Warning: Angle {angle}° for Servo {servo_id} ({SERVOS[servo_id]['name']}) clamped to {clamped}° to stay within limits.")
-    return clamped
+    home_servos(SERVOS)
 
 def walk_smoothly():
-    """Animate walking process using sine and cosine functions."""
+    """Animate walking process along cycloidal swing and lift trajectories."""
     print("\n### Starting smooth walking mode ###\n")
 
-    t = 0
-    delta_t = 0.05  # Time increment
+    tick = 0
+    samples_per_radian = len(GAIT_TABLE) / (2 * pi)
+
+    # Ticks are paced against absolute deadlines, and the gait phase t is read from
+    # the same clock, so time spent moving servos and printing doesn't slow the gait
+    start = deadline = time.monotonic()
 
     try:
         while True:
-            # Dictionary to store current angles for all servos
-            current_angles = {}
-
-            for leg in LEGS:
-                leg_name = leg['name']
-                top_servo_id = leg['top_servo_id']
-                bottom_servo_id = leg['bottom_servo_id']
-                top_servo = SERVOS[top_servo_id]['servo']
-                bottom_servo = SERVOS[bottom_servo_id]['servo']
-
-                # Get AMPLITUDE and OFFSET for the servos
-                top_amplitude = SERVOS[top_servo_id]['AMPLITUDE']
-                top_offset = SERVOS[top_servo_id]['OFFSET']
-                bottom_amplitude = SERVOS[bottom_servo_id]['AMPLITUDE']
-                bottom_offset = SERVOS[bottom_servo_id]['OFFSET']
-
-                # Assign phase shifts
-                if leg_name in ['Front Left', 'Back Right']:
-                    phase_shift = 0
-                elif leg_name in ['Front Right', 'Back Left']:
-                    phase_shift = pi
-                else:
-                    phase_shift = 0
-
-                # Compute phase
-                phase = t + phase_shift
-
-                # Compute angles
-                top_angle = top_amplitude * cos(phase) + top_offset  # Lift servos use cosine
-                bottom_angle = bottom_amplitude * sin(phase) + bottom_offset  # Swing servos use sine
-
-                # Clamp angles to ensure they are within limits
-                top_angle_clamped = clamp_angle(top_servo_id, top_angle)
-                bottom_angle_clamped = clamp_angle(bottom_servo_id, bottom_angle)
-
-                # Move servos
-                top_servo.move(top_angle_clamped)
-                bottom_servo.move(bottom_angle_clamped)
-
-                # Store current angles
-                current_angles[top_servo_id] = top_angle_clamped
-                current_angles[bottom_servo_id] = bottom_angle_clamped
-
-            # Print current angles of all servos
-            print("\n--- Current Servo Angles ---")
-            for servo_id in sorted(SERVOS.keys()):
-                servo_angle = current_angles.get(servo_id, SERVOS[servo_id]['neutral_angle'])
-                servo_name = SERVOS[servo_id]['name']
-                print(f"Servo {servo_id} ({servo_name}): {servo_angle:.2f}°")
-            print("----------------------------\n")
-
-            time.sleep(delta_t)
-            t += FREQUENCY * delta_t
+            t = (time.monotonic() - start) * FREQUENCY
+            targets = GAIT_TABLE[round(t * samples_per_radian) % len(GAIT_TABLE)]
+
+            # Queued as one group move of just the servos whose target moved by at least
+            # one of the servo's 0.24° steps, e.g. not the Top servos through the stance
+            group_writer.submit(targets, skip_unchanged=True)
+
+            # Print current angles of all servos, as one write
+            if tick % TELEMETRY_EVERY == 0:
+                lines = ["\n--- Current Servo Angles ---\n"]
+                for servo_id, (_, servo_angle) in zip(SORTED_SERVO_IDS, targets):
+                    servo_name = SERVOS[servo_id]['name']
+                    lines.append(f"Servo {servo_id} ({servo_name}): {servo_angle:.2f}°\n")
+                lines.append("----------------------------\n\n")
+                sys.stdout.write("".join(lines))
+            tick += 1
+
+            deadline += TICK_TIME
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            elif remaining < -TICK_TIME:
+                deadline -= remaining  # Fell more than a tick behind; don't rush to catch up
     except KeyboardInterrupt:
         print("\nWalking interrupted by user.")
     finally:
+        group_writer.drain()
         # homing_sequence()
         # print("Robot returned to home position.")
         print("Stopped.")